@@ -10,14 +10,21 @@ from telegram.ext import (
     MessageHandler,
     CommandHandler,
     filters,
-    ContextTypes
+    ContextTypes,
+    AIORateLimiter,
+    BaseUpdateProcessor
 )
+from telegram.error import BadRequest, TelegramError
+from telegram.request import HTTPXRequest
 import os
 import logging
 from datetime import datetime
-from pymongo import MongoClient
+from pymongo import AsyncMongoClient
 from pymongo.errors import ConnectionFailure, OperationFailure
+from cachetools import LRUCache
 import asyncio
+import weakref
+import orjson
 
 # Configure logging
 logging.basicConfig(
@@ -33,42 +40,143 @@ MONGODB_URL = os.getenv("MONGODB_URL")
 # Auto-reply configuration
 AUTO_REPLY_ENABLED = True
 AUTO_REPLY_MESSAGE = "✅ Message received! Our team will reply in a few hours. Thank you! 🙏"
+# Message log batching
+LOG_BATCH_SIZE = 100
+LOG_FLUSH_INTERVAL = 0.5
+# In-memory cache of user <-> topic mappings
+USER_CACHE_SIZE = 10000
+
+# Message templates
+NEW_TOPIC_TEMPLATE = (
+    "🆕 <b>New Conversation Started</b>\n\n"
+    "👤 <b>Name:</b> {user_name}\n"
+    "🆔 <b>User ID:</b> <code>{user_id}</code>\n"
+    "📱 <b>Username:</b> @{username}\n"
+    "🕐 <b>Time:</b> {time}"
+)
+WELCOME_MESSAGE = (
+    "👋 <b>Hello {user_name}!</b>\n\n"
+    "📩 Send your message and our team will respond as soon as possible.\n\n"
+    "⚠️ Important: Please do not block the bot, otherwise you will not receive our reply.\n\n"
+    "🙏 Thank you."
+)
+BANNED_MESSAGE = "❌ You are banned from using this bot."
+STATS_TEMPLATE = (
+    "📊 <b>Bot Statistics</b>\n\n"
+    "👥 Total Users: {total_users}\n"
+    "💬 Total Messages: {total_messages}\n"
+    "📁 Database: MongoDB\n"
+    "✅ Status: Active\n"
+    f"🤖 Auto-Reply: {'Enabled' if AUTO_REPLY_ENABLED else 'Disabled'}"
+)
+USER_INFO_TEMPLATE = (
+    "📊 <b>User Information</b>\n\n"
+    "👤 Name: {user_name}\n"
+    "📱 Username: @{username}\n"
+    "🆔 User ID: <code>{user_id}</code>\n\n"
+    "📈 <b>Message Statistics:</b>\n"
+    "  ↗️ From User: {from_user}\n"
+    "  ↙️ To User: {to_user}\n"
+    "  📊 Total: {total}\n\n"
+    "🕐 First Contact: {created_at}\n"
+    "🕐 Last Activity: {updated_at}"
+)
+HELP_MESSAGE = (
+    "ℹ️ <b>How to use this bot:</b>\n\n"
+    "1️⃣ Just send your message/question\n"
+    "2️⃣ You'll get instant confirmation ✅\n"
+    "3️⃣ Our support team will see it\n"
+    "4️⃣ You'll receive a reply here\n\n"
+    "💬 All message types are supported!"
+)
 
 # ==================== MONGODB SETUP ====================
 
+# User fields needed by support team handlers
+USER_PROJECTION = {
+    "_id": 0,
+    "user_id": 1,
+    "user_name": 1,
+    "username": 1,
+    "created_at": 1,
+    "updated_at": 1
+}
+
 class DatabaseManager:
     """Manage MongoDB connections and operations"""
     
     def __init__(self, mongodb_url):
-        """Initialize MongoDB connection"""
+        """Create MongoDB client, connection is checked in init()"""
+        self.client = AsyncMongoClient(
+            mongodb_url,
+            serverSelectionTimeoutMS=5000,
+            maxPoolSize=100,
+            minPoolSize=10,
+            waitQueueTimeoutMS=2000,
+            retryWrites=True
+        )
+        self.db = self.client['telegram_support_bot']
+        self.users = self.db['users']
+        self.messages = self.db['messages']
+        self._log_queue = asyncio.Queue()
+        self._flush_task = None
+        self._topic_by_user = LRUCache(maxsize=USER_CACHE_SIZE)
+        self._user_by_topic = LRUCache(maxsize=USER_CACHE_SIZE)
+    
+    async def init(self):
+        """Check MongoDB connection and create indexes"""
         try:
-            self.client = MongoClient(mongodb_url, serverSelectionTimeoutMS=5000)
-            self.client.admin.command('ping')
+            await self.client.admin.command('ping')
             logger.info("✅ Connected to MongoDB successfully!")
+            logger.info(
+                "✅ MongoDB pool size: %s-%s",
+                self.client.options.pool_options.min_pool_size,
+                self.client.options.pool_options.max_pool_size
+            )
             
-            self.db = self.client['telegram_support_bot']
-            self.users = self.db['users']
-            self.messages = self.db['messages']
-            
-            self.users.create_index("user_id", unique=True)
-            self.messages.create_index([("user_id", 1), ("timestamp", -1)])
+            await self.users.create_index("user_id", unique=True)
+            await self.users.create_index("topic_id", unique=True, sparse=True)
+            await self.messages.create_index([("user_id", 1), ("timestamp", -1)])
+            await self.messages.create_index([("user_id", 1), ("direction", 1)])
             
         except ConnectionFailure as e:
-            logger.error(f"❌ Failed to connect to MongoDB: {e}")
+            logger.error("❌ Failed to connect to MongoDB: %s", e)
             raise
         except Exception as e:
-            logger.error(f"❌ MongoDB initialization error: {e}")
+            logger.error("❌ MongoDB initialization error: %s", e)
             raise
     
-    def get_user_topic(self, user_id):
+    async def get_user_topic(self, user_id):
         """Get topic ID for a user"""
-        user = self.users.find_one({"user_id": user_id})
-        return user['topic_id'] if user else None
+        topic_id = self._topic_by_user.get(user_id)
+        if topic_id is None:
+            user = await self.users.find_one({"user_id": user_id}, {"_id": 0, "topic_id": 1})
+            if user:
+                topic_id = self._topic_by_user[user_id] = user['topic_id']
+        return topic_id
     
-    def save_user_topic(self, user_id, topic_id, user_name, username):
+    async def get_user_by_topic(self, topic_id):
+        """Get user document for a topic"""
+        user = self._user_by_topic.get(topic_id)
+        if user is None:
+            user = await self.users.find_one({"topic_id": topic_id}, USER_PROJECTION)
+            if user:
+                self._user_by_topic[topic_id] = user
+        return user
+    
+    async def delete_user(self, user_id, topic_id):
+        """Delete user if still mapped to topic_id and forget that mapping"""
+        # a concurrent update may already have saved a new topic, keep it
+        await self.users.delete_one({"user_id": user_id, "topic_id": topic_id})
+        self._user_by_topic.pop(topic_id, None)
+        if self._topic_by_user.get(user_id) == topic_id:
+            del self._topic_by_user[user_id]
+    
+    async def save_user_topic(self, user_id, topic_id, user_name, username):
         """Save or update user topic mapping"""
         try:
-            self.users.update_one(
+            now = datetime.utcnow()
+            await self.users.update_one(
                 {"user_id": user_id},
                 {
                     "$set": {
@@ -76,87 +184,117 @@ class DatabaseManager:
                         "topic_id": topic_id,
                         "user_name": user_name,
                         "username": username,
-                        "updated_at": datetime.utcnow()
+                        "updated_at": now
                     },
                     "$setOnInsert": {
-                        "created_at": datetime.utcnow()
+                        "created_at": now
                     }
                 },
                 upsert=True
             )
-            logger.info(f"💾 Saved user {user_id} with topic {topic_id}")
+            self._topic_by_user[user_id] = topic_id
+            # cached document is outdated, reload it on next lookup
+            self._user_by_topic.pop(topic_id, None)
+            logger.info("💾 Saved user %s with topic %s", user_id, topic_id)
             return True
         except Exception as e:
-            logger.error(f"Error saving user topic: {e}")
+            logger.error("Error saving user topic: %s", e)
             return False
     
     def log_message(self, user_id, message_type, direction, content=None):
-        """Log message to database for analytics"""
-        try:
-            self.messages.insert_one({
-                "user_id": user_id,
-                "message_type": message_type,
-                "direction": direction,
-                "content": content,
-                "timestamp": datetime.utcnow()
-            })
-        except Exception as e:
-            logger.error(f"Error logging message: {e}")
+        """Queue message log, written to database in batches by flush_logs()"""
+        self._log_queue.put_nowait({
+            "user_id": user_id,
+            "message_type": message_type,
+            "direction": direction,
+            "content": content,
+            "timestamp": datetime.utcnow()
+        })
+    
+    async def flush_logs(self):
+        """Write queued message logs to database in batches until None is queued"""
+        while True:
+            batch = [await self._log_queue.get()]
+            
+            # give a burst of messages the chance to end up in the same batch
+            if batch[0] is not None and self._log_queue.qsize() < LOG_BATCH_SIZE:
+                await asyncio.sleep(LOG_FLUSH_INTERVAL)
+            
+            while len(batch) < LOG_BATCH_SIZE and not self._log_queue.empty():
+                batch.append(self._log_queue.get_nowait())
+            
+            docs = [doc for doc in batch if doc is not None]
+            if docs:
+                try:
+                    await self.messages.insert_many(docs, ordered=False)
+                except Exception as e:
+                    logger.error("Error logging %s messages: %s", len(docs), e)
+            
+            if len(docs) != len(batch):
+                return
+    
+    def start_log_flusher(self):
+        """Start background task writing message logs"""
+        self._flush_task = asyncio.create_task(self.flush_logs())
     
-    def get_user_stats(self, user_id):
+    async def stop_log_flusher(self):
+        """Write remaining message logs and stop background task"""
+        if self._flush_task:
+            self._log_queue.put_nowait(None)
+            await self._flush_task
+            self._flush_task = None
+    
+    async def get_user_stats(self, user_id):
         """Get statistics for a specific user"""
         try:
-            total_messages = self.messages.count_documents({"user_id": user_id})
-            from_user = self.messages.count_documents({
-                "user_id": user_id,
-                "direction": "from_user"
-            })
-            to_user = self.messages.count_documents({
-                "user_id": user_id,
-                "direction": "to_user"
-            })
+            cursor = await self.messages.aggregate([
+                {"$match": {"user_id": user_id}},
+                {"$group": {"_id": "$direction", "n": {"$sum": 1}}}
+            ])
+            counts = await cursor.to_list(None)
+            by_direction = {c["_id"]: c["n"] for c in counts}
             
             return {
-                "total": total_messages,
-                "from_user": from_user,
-                "to_user": to_user
+                "total": sum(by_direction.values()),
+                "from_user": by_direction.get("from_user", 0),
+                "to_user": by_direction.get("to_user", 0)
             }
         except Exception as e:
-            logger.error(f"Error getting user stats: {e}")
+            logger.error("Error getting user stats: %s", e)
             return None
     
-    def get_all_users(self):
+    async def get_all_users(self):
         """Get all users from database"""
         try:
-            return list(self.users.find({}, {"_id": 0}))
+            return await self.users.find({}, {"_id": 0}).to_list(None)
         except Exception as e:
-            logger.error(f"Error getting all users: {e}")
+            logger.error("Error getting all users: %s", e)
             return []
 
-    def is_user_blocked(self, user_id):
-        user = self.users.find_one({"user_id": user_id})
+    async def is_user_blocked(self, user_id):
+        user = await self.users.find_one({"user_id": user_id}, {"_id": 0, "blocked": 1})
         if user and user.get("blocked", False):
             return True
         return False
 
-    def set_user_block(self, user_id, status):
-        self.users.update_one(
+    async def set_user_block(self, user_id, status):
+        await self.users.update_one(
             {"user_id": user_id},
             {"$set": {"blocked": status}}
         )
     
-    def get_total_stats(self):
+    async def get_total_stats(self):
         """Get overall bot statistics"""
         try:
-            total_users = self.users.count_documents({})
-            total_messages = self.messages.count_documents({})
+            total_users = await self.users.count_documents({})
+            total_messages = await self.messages.count_documents({})
             
             return {
                 "total_users": total_users,
                 "total_messages": total_messages
             }
         except Exception as e:
-            logger.error(f"Error getting total stats: {e}")
+            logger.error("Error getting total stats: %s", e)
             return None
 
 # Initialize database manager
@@ -170,6 +308,67 @@ except Exception as e:
     logger.error("Failed to initialize database. Exiting...")
     exit(1)
 
+# ==================== TELEGRAM REQUEST ====================
+
+class OrjsonRequest(HTTPXRequest):
+    """HTTPX request that parses Telegram responses with orjson"""
+
+    @staticmethod
+    def parse_json_payload(payload: bytes):
+        """Parse JSON returned from Telegram"""
+        try:
+            return orjson.loads(payload)
+        except orjson.JSONDecodeError as exc:
+            logger.error("Can not load invalid JSON data: %s", payload[:200])
+            raise TelegramError("Invalid server response") from exc
+
+# ==================== UPDATE PROCESSING ====================
+
+class ConversationUpdateProcessor(BaseUpdateProcessor):
+    """Process updates concurrently, but in order within each conversation"""
+
+    def __init__(self, max_concurrent_updates):
+        super().__init__(max_concurrent_updates)
+        # locks disappear once no update of the conversation is pending
+        self._locks = weakref.WeakValueDictionary()
+
+    @staticmethod
+    def conversation_key(update):
+        """User chat for private messages, topic for support group messages"""
+        chat = update.effective_chat
+        if chat is None:
+            return None
+        if chat.id == SUPPORT_GROUP_ID:
+            message = update.effective_message
+            thread_id = message.message_thread_id if message and message.is_topic_message else None
+            return ("topic", thread_id)
+        return ("chat", chat.id)
+
+    async def process_update(self, update, coroutine):
+        """Wait for earlier updates of the same conversation, then take a concurrency slot"""
+        # queue on the conversation lock first, so waiting updates don't hold
+        # semaphore slots that other conversations could use
+        key = self.conversation_key(update)
+        if key is None:
+            await super().process_update(update, coroutine)
+            return
+
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        async with lock:
+            await super().process_update(update, coroutine)
+
+    async def do_process_update(self, update, coroutine):
+        """Process update right away, ordering is handled in process_update"""
+        await coroutine
+
+    async def initialize(self):
+        """Nothing to set up"""
+
+    async def shutdown(self):
+        """Nothing to clean up"""
+
 # ==================== SUPPORT BOT FUNCTIONS ====================
 
 async def send_auto_reply(update: Update):
@@ -182,11 +381,11 @@ async def send_auto_reply(update: Update):
             AUTO_REPLY_MESSAGE,
             disable_notification=True
         )
-        logger.info(f"✅ Sent auto-reply to user {update.effective_user.id}")
+        logger.info("✅ Sent auto-reply to user %s", update.effective_user.id)
     except Exception as e:
-        logger.error(f"Error sending auto-reply: {e}")
+        logger.error("Error sending auto-reply: %s", e)
 
-async def forward_to_support(user_id: str, chat_id: int, message_id: int, topic_id: int, context: ContextTypes.DEFAULT_TYPE, user_name: str, username: str):
+async def forward_to_support(user_id: int, chat_id: int, message_id: int, topic_id: int, context: ContextTypes.DEFAULT_TYPE, user_name: str, username: str):
     """Forward message to support group, recreating topic if deleted"""
     try:
         await context.bot.forward_message(
@@ -198,8 +397,8 @@ async def forward_to_support(user_id: str, chat_id: int, message_id: int, topic_
         return topic_id
     except Exception as e:
         if "thread not found" in str(e).lower() or "message thread not found" in str(e).lower():
-            logger.warning(f"Topic {topic_id} was deleted for user {user_id}. Creating new topic...")
-            db.users.delete_one({"user_id": user_id})
+            logger.warning("Topic %s was deleted for user %s. Creating new topic...", topic_id, user_id)
+            await db.delete_user(user_id, topic_id)
             new_topic_id = await get_or_create_topic(user_id, user_name, username, context)
             await context.bot.forward_message(
                 chat_id=SUPPORT_GROUP_ID,
@@ -211,261 +410,148 @@ async def forward_to_support(user_id: str, chat_id: int, message_id: int, topic_
         else:
             raise
 
-async def get_or_create_topic(user_id: str, user_name: str, username: str, context: ContextTypes.DEFAULT_TYPE):
-    """Get existing topic or create new one for user"""
-    topic_id = db.get_user_topic(user_id)
-    
-    if not topic_id:
-        try:
-            topic = await context.bot.create_forum_topic(
-                chat_id=SUPPORT_GROUP_ID,
-                name=f"👤 {user_name[:20]}"
-            )
-            
-            topic_id = topic.message_thread_id
-            db.save_user_topic(user_id, topic_id, user_name, username)
-            
-            welcome_text = (
-                f"🆕 <b>New Conversation Started</b>\n\n"
-                f"👤 <b>Name:</b> {user_name}\n"
-                f"🆔 <b>User ID:</b> <code>{user_id}</code>\n"
-                f"📱 <b>Username:</b> @{username if username else 'None'}\n"
-                f"🕐 <b>Time:</b> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-            )
-            
-            await context.bot.send_message(
-                chat_id=SUPPORT_GROUP_ID,
-                message_thread_id=topic_id,
-                text=welcome_text,
-                parse_mode='HTML',
-                disable_notification=True
-            )
-            
-            logger.info(f"✅ Created new topic for user {user_id} - {user_name}")
-            
-        except Exception as e:
-            logger.error(f"Error creating topic: {e}")
-            raise
-    
-    return topic_id
-
-# ==================== USER MESSAGE HANDLERS ====================
-
-async def handle_text_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handle text messages from users"""
-    if update.effective_chat.type != 'private':
-        return
-    
-    user_id = str(update.effective_user.id)
-    if db.is_user_blocked(user_id):
-        await update.message.reply_text("❌ You are banned from using this bot.")
-        return
-    user_name = update.effective_user.first_name or "User"
-    username = update.effective_user.username or "no_username"
-    
-    try:
-        await send_auto_reply(update)
-        
-        topic_id = await get_or_create_topic(user_id, user_name, username, context)
-        await forward_to_support(
-            user_id, update.effective_chat.id, update.message.message_id,
-            topic_id, context, user_name, username
-        )
-        db.log_message(user_id, "text", "from_user", update.message.text)
-        logger.info(f"✅ Forwarded text message from user {user_id}")
-    except Exception as e:
-        logger.error(f"Error handling text message: {e}")
-        await update.message.reply_text(
-            "❌ Sorry, there was an error processing your message. Please try again."
-        )
-
-async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handle photo messages from users"""
-    if update.effective_chat.type != 'private':
-        return
-    
-    user_id = str(update.effective_user.id)
-    if db.is_user_blocked(user_id):
-        await update.message.reply_text("❌ You are banned from using this bot.")
-        return
-    user_name = update.effective_user.first_name or "User"
-    username = update.effective_user.username or "no_username"
-    
+async def create_topic(user_id: int, user_name: str, username: str, context: ContextTypes.DEFAULT_TYPE):
+    """Create new topic for user and post user details in it"""
     try:
-        await send_auto_reply(update)
-        
-        topic_id = await get_or_create_topic(user_id, user_name, username, context)
-        await forward_to_support(
-            user_id, update.effective_chat.id, update.message.message_id,
-            topic_id, context, user_name, username
+        topic = await context.bot.create_forum_topic(
+            chat_id=SUPPORT_GROUP_ID,
+            name=f"👤 {user_name[:20]}"
         )
-        db.log_message(user_id, "photo", "from_user", update.message.caption)
-        logger.info(f"✅ Forwarded photo from user {user_id}")
-    except Exception as e:
-        logger.error(f"Error handling photo: {e}")
-        await update.message.reply_text("❌ Error sending photo. Please try again.")
-
-async def handle_video(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handle video messages from users"""
-    if update.effective_chat.type != 'private':
-        return
-    
-    user_id = str(update.effective_user.id)
-    if db.is_user_blocked(user_id):
-        await update.message.reply_text("❌ You are banned from using this bot.")
-        return
-    user_name = update.effective_user.first_name or "User"
-    username = update.effective_user.username or "no_username"
-    
-    try:
-        await send_auto_reply(update)
         
-        topic_id = await get_or_create_topic(user_id, user_name, username, context)
-        await forward_to_support(
-            user_id, update.effective_chat.id, update.message.message_id,
-            topic_id, context, user_name, username
-        )
-        db.log_message(user_id, "video", "from_user", update.message.caption)
-        logger.info(f"✅ Forwarded video from user {user_id}")
-    except Exception as e:
-        logger.error(f"Error handling video: {e}")
-        await update.message.reply_text("❌ Error sending video. Please try again.")
-
-async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handle document messages from users"""
-    if update.effective_chat.type != 'private':
-        return
-    
-    user_id = str(update.effective_user.id)
-    if db.is_user_blocked(user_id):
-        await update.message.reply_text("❌ You are banned from using this bot.")
-        return
-    user_name = update.effective_user.first_name or "User"
-    username = update.effective_user.username or "no_username"
-    
-    try:
-        await send_auto_reply(update)
+        topic_id = topic.message_thread_id
+        await db.save_user_topic(user_id, topic_id, user_name, username)
         
-        topic_id = await get_or_create_topic(user_id, user_name, username, context)
-        await forward_to_support(
-            user_id, update.effective_chat.id, update.message.message_id,
-            topic_id, context, user_name, username
+        welcome_text = NEW_TOPIC_TEMPLATE.format(
+            user_name=user_name,
+            user_id=user_id,
+            username=username if username else 'None',
+            time=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         )
-        file_name = update.message.document.file_name if update.message.document else "file"
-        db.log_message(user_id, "document", "from_user", file_name)
-        logger.info(f"✅ Forwarded document from user {user_id}")
-    except Exception as e:
-        logger.error(f"Error handling document: {e}")
-        await update.message.reply_text("❌ Error sending file. Please try again.")
-
-async def handle_voice(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handle voice messages from users"""
-    if update.effective_chat.type != 'private':
-        return
-    
-    user_id = str(update.effective_user.id)
-    if db.is_user_blocked(user_id):
-        await update.message.reply_text("❌ You are banned from using this bot.")
-        return
-    user_name = update.effective_user.first_name or "User"
-    username = update.effective_user.username or "no_username"
-    
-    try:
-        await send_auto_reply(update)
         
-        topic_id = await get_or_create_topic(user_id, user_name, username, context)
-        await context.bot.forward_message(
+        await context.bot.send_message(
             chat_id=SUPPORT_GROUP_ID,
-            from_chat_id=update.effective_chat.id,
-            message_id=update.message.message_id,
-            message_thread_id=topic_id
+            message_thread_id=topic_id,
+            text=welcome_text,
+            parse_mode='HTML',
+            disable_notification=True
         )
-        db.log_message(user_id, "voice", "from_user")
-        logger.info(f"✅ Forwarded voice message from user {user_id}")
+        
+        logger.info("✅ Created new topic for user %s - %s", user_id, user_name)
+        return topic_id
+        
     except Exception as e:
-        logger.error(f"Error handling voice: {e}")
-        await update.message.reply_text("❌ Error sending voice message. Please try again.")
+        logger.error("Error creating topic: %s", e)
+        raise
 
-async def handle_audio(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handle audio messages from users"""
-    if update.effective_chat.type != 'private':
-        return
+async def get_or_create_topic(user_id: int, user_name: str, username: str, context: ContextTypes.DEFAULT_TYPE):
+    """Get existing topic or create new one for user"""
+    # only reached from the user's private chat, whose updates
+    # ConversationUpdateProcessor runs one at a time, so no lock is needed
+    topic_id = await db.get_user_topic(user_id)
     
-    user_id = str(update.effective_user.id)
-    if db.is_user_blocked(user_id):
-        await update.message.reply_text("❌ You are banned from using this bot.")
-        return
-    user_name = update.effective_user.first_name or "User"
-    username = update.effective_user.username or "no_username"
+    if not topic_id:
+        topic_id = await create_topic(user_id, user_name, username, context)
     
-    try:
-        await send_auto_reply(update)
-        
-        topic_id = await get_or_create_topic(user_id, user_name, username, context)
-        await forward_to_support(
-            user_id, update.effective_chat.id, update.message.message_id,
-            topic_id, context, user_name, username
-        )
-        db.log_message(user_id, "audio", "from_user")
-        logger.info(f"✅ Forwarded audio from user {user_id}")
-    except Exception as e:
-        logger.error(f"Error handling audio: {e}")
-        await update.message.reply_text("❌ Error sending audio. Please try again.")
+    return topic_id
+
+# ==================== USER MESSAGE HANDLERS ====================
 
-async def handle_sticker(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handle sticker messages from users"""
+# (message type, content to log, error reply) - message type is also the Message attribute
+USER_MESSAGE_TYPES = [
+    ("text", lambda m: m.text, "❌ Sorry, there was an error processing your message. Please try again."),
+    ("photo", lambda m: m.caption, "❌ Error sending photo. Please try again."),
+    ("video", lambda m: m.caption, "❌ Error sending video. Please try again."),
+    ("document", lambda m: m.document.file_name, "❌ Error sending file. Please try again."),
+    ("voice", lambda m: None, "❌ Error sending voice message. Please try again."),
+    ("audio", lambda m: None, "❌ Error sending audio. Please try again."),
+    ("sticker", lambda m: None, None),
+    ("video_note", lambda m: None, None),
+]
+
+async def handle_user_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle messages of any supported type from users"""
     if update.effective_chat.type != 'private':
         return
     
-    user_id = str(update.effective_user.id)
-    if db.is_user_blocked(user_id):
-        await update.message.reply_text("❌ You are banned from using this bot.")
-        return
-    user_name = update.effective_user.first_name or "User"
-    username = update.effective_user.username or "no_username"
-    
-    try:
-        await send_auto_reply(update)
-        
-        topic_id = await get_or_create_topic(user_id, user_name, username, context)
-        await forward_to_support(
-            user_id, update.effective_chat.id, update.message.message_id,
-            topic_id, context, user_name, username
-        )
-        db.log_message(user_id, "sticker", "from_user")
-        logger.info(f"✅ Forwarded sticker from user {user_id}")
-    except Exception as e:
-        logger.error(f"Error handling sticker: {e}")
-
-async def handle_video_note(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handle video notes (round videos) from users"""
-    if update.effective_chat.type != 'private':
+    message = update.message
+    for message_type, get_content, error_reply in USER_MESSAGE_TYPES:
+        if getattr(message, message_type):
+            break
+    else:
         return
     
-    user_id = str(update.effective_user.id)
-    if db.is_user_blocked(user_id):
-        await update.message.reply_text("❌ You are banned from using this bot.")
+    user_id = update.effective_user.id
+    if await db.is_user_blocked(user_id):
+        await message.reply_text(BANNED_MESSAGE)
         return
     user_name = update.effective_user.first_name or "User"
     username = update.effective_user.username or "no_username"
     
     try:
-        await send_auto_reply(update)
+        # auto-reply doesn't depend on the forward, let them overlap,
+        # PTB tracks the task so it isn't lost if topic handling fails
+        auto_reply = context.application.create_task(send_auto_reply(update), update=update)
         
         topic_id = await get_or_create_topic(user_id, user_name, username, context)
-        await context.bot.forward_message(
-            chat_id=SUPPORT_GROUP_ID,
-            from_chat_id=update.effective_chat.id,
-            message_id=update.message.message_id,
-            message_thread_id=topic_id
+        await asyncio.gather(
+            auto_reply,
+            forward_to_support(
+                user_id, update.effective_chat.id, message.message_id,
+                topic_id, context, user_name, username
+            )
         )
-        db.log_message(user_id, "video_note", "from_user")
-        logger.info(f"✅ Forwarded video note from user {user_id}")
+        db.log_message(user_id, message_type, "from_user", get_content(message))
+        logger.info("✅ Forwarded %s from user %s", message_type, user_id)
     except Exception as e:
-        logger.error(f"Error handling video note: {e}")
+        logger.error("Error handling %s: %s", message_type, e)
+        if error_reply:
+            await message.reply_text(error_reply)
 
 # ==================== SUPPORT TEAM HANDLERS ====================
 
+# (error substrings, notice for support team, log message) - checked in order
+REPLY_ERRORS = [
+    (
+        ("blocked",),
+        "⚠️ <b>Cannot send message - User has blocked the bot</b>\n\n"
+        "👤 <b>User ID:</b> <code>{user_id}</code>\n"
+        "📝 <b>User:</b> {user_name}\n"
+        "📱 <b>Username:</b> @{username}\n\n"
+        "💡 <b>Note:</b> The user needs to unblock the bot and send /start again to receive messages.",
+        "⚠️ User %s has blocked the bot"
+    ),
+    (
+        ("chat not found", "user not found"),
+        "⚠️ <b>Cannot send message - User account not found</b>\n\n"
+        "👤 <b>User ID:</b> <code>{user_id}</code>\n\n"
+        "💡 <b>Possible reasons:</b>\n"
+        "• User deleted their Telegram account\n"
+        "• Invalid user ID\n"
+        "• User deactivated their account",
+        "⚠️ User %s not found (account may be deleted)"
+    ),
+    (
+        ("bot can't initiate conversation",),
+        "⚠️ <b>Cannot send message - Bot cannot initiate conversation</b>\n\n"
+        "👤 <b>User ID:</b> <code>{user_id}</code>\n\n"
+        "💡 <b>Solution:</b> The user needs to send /start to the bot first.",
+        "⚠️ Cannot initiate conversation with user %s"
+    ),
+    (
+        ("forbidden",),
+        "⚠️ <b>Cannot send message - Access forbidden</b>\n\n"
+        "👤 <b>User ID:</b> <code>{user_id}</code>\n\n"
+        "💡 <b>Note:</b> User may have blocked the bot or privacy settings prevent messaging.",
+        "⚠️ Forbidden to send message to user %s"
+    ),
+]
+REPLY_ERROR_DEFAULT = (
+    "❌ <b>Failed to send message to user</b>\n\n"
+    "👤 <b>User ID:</b> <code>{user_id}</code>\n"
+    "🔍 <b>Error:</b> {error}\n\n"
+    "💡 <b>Note:</b> Please check the error details above."
+)
+
 async def handle_reply(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle replies from support team"""
     if update.effective_chat.id != SUPPORT_GROUP_ID:
@@ -477,12 +563,12 @@ async def handle_reply(update: Update, context: ContextTypes.DEFAULT_TYPE):
     topic_id = update.message.message_thread_id
     user_id = None
     
-    user = db.users.find_one({"topic_id": topic_id})
+    user = await db.get_user_by_topic(topic_id)
     if user:
         user_id = user['user_id']
     
     if not user_id:
-        logger.warning(f"No user found for topic {topic_id}")
+        logger.warning("No user found for topic %s", topic_id)
         return
     
     try:
@@ -490,105 +576,78 @@ async def handle_reply(update: Update, context: ContextTypes.DEFAULT_TYPE):
         
         if update.message.text:
             await context.bot.send_message(
-                chat_id=int(user_id),
+                chat_id=user_id,
                 text=update.message.text
             )
             message_type = "text"
         elif update.message.photo:
             await context.bot.send_photo(
-                chat_id=int(user_id),
+                chat_id=user_id,
                 photo=update.message.photo[-1].file_id,
                 caption=update.message.caption
             )
             message_type = "photo"
         elif update.message.video:
             await context.bot.send_video(
-                chat_id=int(user_id),
+                chat_id=user_id,
                 video=update.message.video.file_id,
                 caption=update.message.caption
             )
             message_type = "video"
         elif update.message.document:
             await context.bot.send_document(
-                chat_id=int(user_id),
+                chat_id=user_id,
                 document=update.message.document.file_id,
                 caption=update.message.caption
             )
             message_type = "document"
         elif update.message.voice:
             await context.bot.send_voice(
-                chat_id=int(user_id),
+                chat_id=user_id,
                 voice=update.message.voice.file_id,
                 caption=update.message.caption
             )
             message_type = "voice"
         elif update.message.audio:
             await context.bot.send_audio(
-                chat_id=int(user_id),
+                chat_id=user_id,
                 audio=update.message.audio.file_id,
                 caption=update.message.caption
             )
             message_type = "audio"
         elif update.message.sticker:
             await context.bot.send_sticker(
-                chat_id=int(user_id),
+                chat_id=user_id,
                 sticker=update.message.sticker.file_id
             )
             message_type = "sticker"
         elif update.message.video_note:
             await context.bot.send_video_note(
-                chat_id=int(user_id),
+                chat_id=user_id,
                 video_note=update.message.video_note.file_id
             )
             message_type = "video_note"
         
         db.log_message(user_id, message_type, "to_user", update.message.text)
-        logger.info(f"✅ Sent {message_type} reply to user {user_id}")
+        logger.info("✅ Sent %s reply to user %s", message_type, user_id)
         
     except Exception as e:
         error_message = str(e).lower()
         
-        if "blocked" in error_message or "bot was blocked" in error_message:
-            error_details = (
-                f"⚠️ <b>Cannot send message - User has blocked the bot</b>\n\n"
-                f"👤 <b>User ID:</b> <code>{user_id}</code>\n"
-                f"📝 <b>User:</b> {user.get('user_name', 'Unknown')}\n"
-                f"📱 <b>Username:</b> @{user.get('username', 'N/A')}\n\n"
-                f"💡 <b>Note:</b> The user needs to unblock the bot and send /start again to receive messages."
-            )
-            logger.warning(f"⚠️ User {user_id} has blocked the bot")
-        elif "chat not found" in error_message or "user not found" in error_message:
-            error_details = (
-                f"⚠️ <b>Cannot send message - User account not found</b>\n\n"
-                f"👤 <b>User ID:</b> <code>{user_id}</code>\n\n"
-                f"💡 <b>Possible reasons:</b>\n"
-                f"• User deleted their Telegram account\n"
-                f"• Invalid user ID\n"
-                f"• User deactivated their account"
-            )
-            logger.warning(f"⚠️ User {user_id} not found (account may be deleted)")
-        elif "bot can't initiate conversation" in error_message:
-            error_details = (
-                f"⚠️ <b>Cannot send message - Bot cannot initiate conversation</b>\n\n"
-                f"👤 <b>User ID:</b> <code>{user_id}</code>\n\n"
-                f"💡 <b>Solution:</b> The user needs to send /start to the bot first."
-            )
-            logger.warning(f"⚠️ Cannot initiate conversation with user {user_id}")
-        elif "forbidden" in error_message:
-            error_details = (
-                f"⚠️ <b>Cannot send message - Access forbidden</b>\n\n"
-                f"👤 <b>User ID:</b> <code>{user_id}</code>\n\n"
-                f"💡 <b>Note:</b> User may have blocked the bot or privacy settings prevent messaging."
-            )
-            logger.warning(f"⚠️ Forbidden to send message to user {user_id}")
+        for keys, template, log_text in REPLY_ERRORS:
+            if any(key in error_message for key in keys):
+                logger.warning(log_text, user_id)
+                break
         else:
-            error_details = (
-                f"❌ <b>Failed to send message to user</b>\n\n"
-                f"👤 <b>User ID:</b> <code>{user_id}</code>\n"
-                f"🔍 <b>Error:</b> {str(e)}\n\n"
-                f"💡 <b>Note:</b> Please check the error details above."
-            )
-            logger.error(f"❌ Error sending reply to user {user_id}: {e}")
+            template = REPLY_ERROR_DEFAULT
+            logger.error("❌ Error sending reply to user %s: %s", user_id, e)
+        
+        error_details = template.format(
+            user_id=user_id,
+            user_name=user.get('user_name', 'Unknown'),
+            username=user.get('username', 'N/A'),
+            error=str(e)
+        )
         
         try:
             await update.message.reply_text(
@@ -597,7 +656,7 @@ async def handle_reply(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 parse_mode='HTML'
             )
         except Exception as notification_error:
-            logger.error(f"Failed to send error notification: {notification_error}")
+            logger.error("Failed to send error notification: %s", notification_error)
 
 # ==================== COMMANDS ====================
 
@@ -606,15 +665,7 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.effective_chat.type != 'private':
         return
 
-    user_name = update.effective_user.first_name
-    
-    welcome_message = (
-        f"👋 <b>Hello {user_name}!</b>\n\n"
-        "📩 Send your message and our team will respond as soon as possible.\n\n"
-        "⚠️ Important: Please do not block the bot, otherwise you will not receive our reply.\n\n"
-        "🙏 Thank you."
-    )
-    
+    welcome_message = WELCOME_MESSAGE.format(user_name=update.effective_user.first_name)
     await update.message.reply_text(welcome_message, parse_mode='HTML')
 
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -622,33 +673,17 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.effective_chat.type != 'private':
         return
     
-    help_message = (
-        "ℹ️ <b>How to use this bot:</b>\n\n"
-        "1️⃣ Just send your message/question\n"
-        "2️⃣ You'll get instant confirmation ✅\n"
-        "3️⃣ Our support team will see it\n"
-        "4️⃣ You'll receive a reply here\n\n"
-        "💬 All message types are supported!"
-    )
-    
-    await update.message.reply_text(help_message, parse_mode='HTML')
+    await update.message.reply_text(HELP_MESSAGE, parse_mode='HTML')
 
 async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /stats command - show bot statistics (admin only)"""
     if update.effective_chat.id != SUPPORT_GROUP_ID:
         return
     
-    stats = db.get_total_stats()
+    stats = await db.get_total_stats()
     
     if stats:
-        stats_message = (
-            f"📊 <b>Bot Statistics</b>\n\n"
-            f"👥 Total Users: {stats['total_users']}\n"
-            f"💬 Total Messages: {stats['total_messages']}\n"
-            f"📁 Database: MongoDB\n"
-            f"✅ Status: Active\n"
-            f"🤖 Auto-Reply: {'Enabled' if AUTO_REPLY_ENABLED else 'Disabled'}"
-        )
+        stats_message = STATS_TEMPLATE.format(**stats)
     else:
         stats_message = "❌ Error fetching statistics"
     
@@ -664,59 +699,75 @@ async def userinfo_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     topic_id = update.message.message_thread_id
-    user = db.users.find_one({"topic_id": topic_id})
+    user = await db.get_user_by_topic(topic_id)
     if not user:
         await update.message.reply_text("❌ User not found for this topic.")
         return
     
     user_id = user['user_id']
-    stats = db.get_user_stats(user_id)
+    stats = await db.get_user_stats(user_id)
     
     if stats:
-        info_message = (
-            f"📊 <b>User Information</b>\n\n"
-            f"👤 Name: {user.get('user_name', 'N/A')}\n"
-            f"📱 Username: @{user.get('username', 'N/A')}\n"
-            f"🆔 User ID: <code>{user_id}</code>\n\n"
-            f"📈 <b>Message Statistics:</b>\n"
-            f"  ↗️ From User: {stats['from_user']}\n"
-            f"  ↙️ To User: {stats['to_user']}\n"
-            f"  📊 Total: {stats['total']}\n\n"
-            f"🕐 First Contact: {user.get('created_at', 'N/A')}\n"
-            f"🕐 Last Activity: {user.get('updated_at', 'N/A')}"
+        info_message = USER_INFO_TEMPLATE.format(
+            user_name=user.get('user_name', 'N/A'),
+            username=user.get('username', 'N/A'),
+            user_id=user_id,
+            created_at=user.get('created_at', 'N/A'),
+            updated_at=user.get('updated_at', 'N/A'),
+            **stats
         )
     else:
         info_message = "❌ Error fetching user information"
     
     await update.message.reply_text(info_message, parse_mode='HTML', message_thread_id=topic_id)
 
-async def ban_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def set_topic_user_block(update: Update, status: bool):
+    """Block or unblock the user owning the current topic"""
     if update.effective_chat.id != SUPPORT_GROUP_ID:
-        return
+        return False
 
     topic_id = update.message.message_thread_id
-    user = db.users.find_one({"topic_id": topic_id})
+    user = await db.get_user_by_topic(topic_id)
 
     if not user:
         await update.message.reply_text("❌ User not found.")
-        return
-
-    db.set_user_block(user["user_id"], True)
-    await update.message.reply_text("🚫 User banned.")
-
-async def unban_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if update.effective_chat.id != SUPPORT_GROUP_ID:
-        return
+        return False
 
-    topic_id = update.message.message_thread_id
-    user = db.users.find_one({"topic_id": topic_id})
+    await db.set_user_block(user["user_id"], status)
+    return True
 
-    if not user:
-        await update.message.reply_text("❌ User not found.")
-        return
+async def ban_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if await set_topic_user_block(update, True):
+        await update.message.reply_text("🚫 User banned.")
 
-    db.set_user_block(user["user_id"], False)
-    await update.message.reply_text("✅ User unbanned.")
+async def unban_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if await set_topic_user_block(update, False):
+        await update.message.reply_text("✅ User unbanned.")
+
+def deletion_errors(results):
+    """Exceptions from gathered deletes, ignoring messages that are already gone"""
+    return [
+        result for result in results
+        if isinstance(result, Exception)
+        and not (isinstance(result, BadRequest) and "not found" in str(result).lower())
+    ]
+
+async def delete_group_messages(context: ContextTypes.DEFAULT_TYPE, messages):
+    """Delete messages in the support group, one request per message only as fallback"""
+    try:
+        await context.bot.delete_messages(
+            chat_id=SUPPORT_GROUP_ID,
+            message_ids=[m.message_id for m in messages]
+        )
+    except BadRequest:
+        # one of them can't be deleted, retry all of them concurrently
+        results = await asyncio.gather(
+            *(m.delete() for m in messages),
+            return_exceptions=True
+        )
+        errors = deletion_errors(results)
+        if errors:
+            raise errors[0]
 
 async def delete_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.effective_chat.id != SUPPORT_GROUP_ID:
@@ -728,30 +779,52 @@ async def delete_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     msg = update.message.reply_to_message
 
-    try:
-        # delete in group
-        await msg.delete()
-
-        # delete from user chat if forwarded
-        if msg.forward_from and msg.forward_from.id:
-            await context.bot.delete_message(
-                chat_id=msg.forward_from.id,
-                message_id=msg.forward_from_message_id
-            )
+    # delete target and command in group
+    deletions = [delete_group_messages(context, [msg, update.message])]
 
-        await update.message.delete()
+    # delete from user chat if forwarded
+    if msg.forward_from and msg.forward_from.id:
+        deletions.append(context.bot.delete_message(
+            chat_id=msg.forward_from.id,
+            message_id=msg.forward_from_message_id
+        ))
 
-    except Exception as e:
-        await update.message.reply_text("❌ Failed to delete message.")
+    results = await asyncio.gather(*deletions, return_exceptions=True)
+
+    errors = deletion_errors(results)
+
+    if errors:
+        logger.warning("Failed to delete message %s: %s", msg.message_id, errors[0])
+        # the command itself may already be gone, so don't reply to it
+        try:
+            await context.bot.send_message(
+                chat_id=SUPPORT_GROUP_ID,
+                message_thread_id=(
+                    update.message.message_thread_id
+                    if update.message.is_topic_message else None
+                ),
+                text="❌ Failed to delete message."
+            )
+        except Exception as notification_error:
+            logger.error("Failed to send error notification: %s", notification_error)
 
 # ==================== ERROR HANDLER ====================
 
 async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE):
     """Handle errors"""
-    logger.error(f"Exception: {context.error}")
+    logger.error("Exception: %s", context.error)
 
 # ==================== MAIN FUNCTION ====================
 
+async def post_init(application: Application):
+    """Connect to MongoDB once the event loop is running"""
+    await db.init()
+    db.start_log_flusher()
+
+async def post_shutdown(application: Application):
+    """Write pending message logs before exit"""
+    await db.stop_log_flusher()
+
 def main():
     """Main function to run the support bot"""
     
@@ -766,14 +839,30 @@ def main():
     logger.info("=" * 60)
     logger.info("🤖 STARTING SUPPORT BOT")
     logger.info("=" * 60)
-    logger.info(f"✅ Bot Token: {SUPPORT_BOT_TOKEN[:10]}...")
-    logger.info(f"✅ Support Group ID: {SUPPORT_GROUP_ID}")
-    logger.info(f"✅ Auto-Reply: {'ENABLED' if AUTO_REPLY_ENABLED else 'DISABLED'}")
-    logger.info(f"✅ Database: MongoDB")
+    logger.info("✅ Bot Token: %s...", SUPPORT_BOT_TOKEN[:10])
+    logger.info("✅ Support Group ID: %s", SUPPORT_GROUP_ID)
+    logger.info("✅ Auto-Reply: %s", 'ENABLED' if AUTO_REPLY_ENABLED else 'DISABLED')
+    logger.info("✅ Database: MongoDB")
     logger.info("=" * 60)
     
     # Create application
-    app = Application.builder().token(SUPPORT_BOT_TOKEN).build()
+    app = (
+        Application.builder()
+        .token(SUPPORT_BOT_TOKEN)
+        .request(OrjsonRequest(
+            connection_pool_size=256,
+            pool_timeout=30,
+            connect_timeout=10,
+            read_timeout=30
+        ))
+        .get_updates_request(OrjsonRequest())
+        .concurrent_updates(ConversationUpdateProcessor(256))
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        # stay just under Telegram's 30/s global limit, per-chat groups default to 20/min
+        .rate_limiter(AIORateLimiter(overall_max_rate=28, overall_time_period=1, max_retries=3))
+        .build()
+    )
     
     # Add command handlers
     app.add_handler(CommandHandler("start", start_command))
@@ -784,38 +873,19 @@ def main():
     app.add_handler(CommandHandler("unban", unban_command))
     app.add_handler(CommandHandler("delete", delete_command))
     
-    # Add message handlers for private chats (user messages)
-    app.add_handler(MessageHandler(
-        filters.TEXT & filters.ChatType.PRIVATE & ~filters.COMMAND,
-        handle_text_message
-    ))
-    app.add_handler(MessageHandler(
-        filters.PHOTO & filters.ChatType.PRIVATE,
-        handle_photo
-    ))
-    app.add_handler(MessageHandler(
-        filters.VIDEO & filters.ChatType.PRIVATE,
-        handle_video
-    ))
-    app.add_handler(MessageHandler(
-        filters.Document.ALL & filters.ChatType.PRIVATE,
-        handle_document
-    ))
-    app.add_handler(MessageHandler(
-        filters.VOICE & filters.ChatType.PRIVATE,
-        handle_voice
-    ))
-    app.add_handler(MessageHandler(
-        filters.AUDIO & filters.ChatType.PRIVATE,
-        handle_audio
-    ))
-    app.add_handler(MessageHandler(
-        filters.Sticker.ALL & filters.ChatType.PRIVATE,
-        handle_sticker
-    ))
+    # Add message handler for private chats (user messages)
     app.add_handler(MessageHandler(
-        filters.VIDEO_NOTE & filters.ChatType.PRIVATE,
-        handle_video_note
+        filters.ChatType.PRIVATE & (
+            (filters.TEXT & ~filters.COMMAND)
+            | filters.PHOTO
+            | filters.VIDEO
+            | filters.Document.ALL
+            | filters.VOICE
+            | filters.AUDIO
+            | filters.Sticker.ALL
+            | filters.VIDEO_NOTE
+        ),
+        handle_user_message
     ))
     
     # Add handler for support group replies
@@ -832,7 +902,8 @@ def main():
     logger.info("=" * 60)
     
     # Start the bot
-    app.run_polling(allowed_updates=Update.ALL_TYPES)
+    # Only new messages are handled, skip edits, callbacks, member updates etc.
+    app.run_polling(allowed_updates=[Update.MESSAGE])
 
 # ==================== HEALTH CHECK SERVER ====================
 import threading
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+One-off migration - convert string user_id values to integers
+Run against the support bot database before deploying the int user_id version,
+safe to re-run - users that already have an int document are skipped and logged
+"""
+
+import os
+import re
+import logging
+from pymongo import MongoClient
+from pymongo.errors import DuplicateKeyError
+
+# Configure logging
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+MONGODB_URL = os.getenv("MONGODB_URL")
+
+# Telegram IDs can exceed 32 bits, so always convert to long
+TO_LONG = [{"$set": {"user_id": {"$toLong": "$user_id"}}}]
+# What $toLong accepts, ASCII digits only - shared by users and messages
+NUMERIC_ID = r"-?[0-9]+"
+
+def migrate_users(users):
+    """Convert users one by one, skipping those that would hit the unique user_id index"""
+    converted = skipped = 0
+
+    for user in users.find({"user_id": {"$type": "string"}}, {"user_id": 1}):
+        user_id = user["user_id"]
+        if not re.fullmatch(NUMERIC_ID, user_id):
+            logger.warning("⚠️ users: skipping non-numeric user_id %r", user_id)
+            skipped += 1
+            continue
+
+        if users.find_one({"user_id": int(user_id)}, {"_id": 1}):
+            logger.warning("⚠️ users: %s already has an int document, skipping", user_id)
+            skipped += 1
+            continue
+
+        try:
+            users.update_one({"_id": user["_id"]}, TO_LONG)
+            converted += 1
+        except DuplicateKeyError:
+            # created by the running bot since the check above
+            logger.warning("⚠️ users: %s already has an int document, skipping", user_id)
+            skipped += 1
+
+    logger.info("✅ users: converted %s documents, skipped %s", converted, skipped)
+
+def main():
+    """Convert user_id in users and messages collections"""
+    if not MONGODB_URL:
+        logger.error("MONGODB_URL environment variable is not set!")
+        return
+
+    client = MongoClient(MONGODB_URL, serverSelectionTimeoutMS=5000)
+    db = client['telegram_support_bot']
+
+    migrate_users(db["users"])
+
+    # messages have no unique index on user_id, convert them in one go
+    result = db["messages"].update_many(
+        {"user_id": {"$type": "string", "$regex": f"^{NUMERIC_ID}$"}},
+        TO_LONG
+    )
+    logger.info("✅ messages: converted %s documents", result.modified_count)
+
+    client.close()
+
+if __name__ == '__main__':
+    main()